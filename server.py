@@ -1,45 +1,464 @@
 import os
 import json
-import subprocess
+import asyncio
+import atexit
+import fnmatch
+import functools
+import shlex
+import shutil
+import tempfile
+import time
+from collections import deque
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Dict, Optional, Union, Any
+from typing import List, Dict, Optional, Set, Tuple, Union, Any
 
 from mcp.server.fastmcp import FastMCP, Context, Image
 from mcp.server.base import UserMessage, AssistantMessage
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Initialize the MCP server
 mcp = FastMCP("EchidnaMCP")
 
+# Progress notifications can be disabled with ECHIDNA_MCP_PROGRESS=0
+_PROGRESS_ENABLED = os.environ.get("ECHIDNA_MCP_PROGRESS", "1") == "1"
+
+# Maximum number of trailing output lines kept per stream of a subprocess
+OUTPUT_TAIL_LINES = 2048
+
+# Longer output lines are truncated to this many bytes
+OUTPUT_LINE_BYTES = 1024 * 1024
+
+# Compiled crytic-compile archives, keyed by contract and config paths and invalidated
+# by the mtimes of every file the compilation read
+_compile_cache: Dict[Tuple[str, ...], Tuple[Tuple[Tuple[str, int], ...], str]] = {}
+
+# One lock per compile cache key, so concurrent runs against a contract compile it once
+_compile_locks: Dict[Tuple[str, ...], asyncio.Lock] = {}
+
+# Number of Echidna runs reading each archive; evicted archives are deleted once unused
+_archive_users: Dict[str, int] = {}
+_evicted_archives: Set[str] = set()
+
+# Corpus scans, keyed by corpus directory and invalidated by the mtimes of every scanned directory
+CORPUS_CACHE_SIZE = 32
+
+# Scans of directories modified less than this long before the scan are not cached
+CORPUS_RACY_WINDOW_NS = 2_000_000_000
+_corpus_cache: Dict[str, "CorpusScan"] = {}
+
+# Echidna features document and its contents, loaded on first access
+_FEATURES_PATH = Path(__file__).resolve().parent / "LLM" / "echdina-features.md"
+_features_cache: Optional[str] = None
+
 # Utility functions
-def run_command(cmd: List[str], cwd: Optional[str] = None) -> Dict[str, str]:
-    """Run a shell command and return stdout, stderr, and return code."""
+async def _read_stream(stream: asyncio.StreamReader, buffer: deque, max_line_bytes: int = OUTPUT_LINE_BYTES) -> int:
+    """Read a subprocess stream line by line into a bounded buffer and return the line count."""
+    count = 0
+    head = b""
+    while True:
+        try:
+            line = await stream.readuntil(b"\n")
+        except asyncio.IncompleteReadError as e:
+            # Last line without a trailing newline, or b"" at EOF
+            line = e.partial
+        except asyncio.LimitOverrunError as e:
+            # Line longer than the stream limit: keep its first bytes and skip the rest
+            chunk = await stream.readexactly(e.consumed)
+            head += chunk[:max(0, max_line_bytes - len(head))]
+            continue
+        if not line and not head:
+            return count
+        if head:
+            line = head + line
+            head = b""
+            if len(line) > max_line_bytes:
+                line = line[:max_line_bytes] + (b"\n" if line.endswith(b"\n") else b"")
+        buffer.append(line.decode(errors="replace"))
+        count += 1
+
+async def run_command(
+    cmd: List[str],
+    cwd: Optional[str] = None,
+    tail_lines: int = OUTPUT_TAIL_LINES,
+) -> Dict[str, Any]:
+    """
+    Run a command without blocking the event loop and return stdout, stderr, and return code.
+
+    Output is streamed and only the last `tail_lines` lines of each stream are kept,
+    so memory stays flat for long-running fuzzing campaigns.
+    """
     try:
-        process = subprocess.run(
-            cmd,
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
             cwd=cwd,
-            capture_output=True,
-            text=True,
-            check=False,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
         )
+    except Exception as e:
         return {
-            "stdout": process.stdout,
-            "stderr": process.stderr,
+            "stdout": "",
+            "stderr": str(e),
+            "returncode": -1,
+            "stdout_lines": 0,
+            "stderr_lines": 0,
+        }
+
+    try:
+        stdout: deque = deque(maxlen=tail_lines)
+        stderr: deque = deque(maxlen=tail_lines)
+        stdout_lines, stderr_lines = await asyncio.gather(
+            _read_stream(process.stdout, stdout),
+            _read_stream(process.stderr, stderr),
+        )
+        await process.wait()
+        return {
+            "stdout": "".join(stdout),
+            "stderr": "".join(stderr),
             "returncode": process.returncode,
+            "stdout_lines": stdout_lines,
+            "stderr_lines": stderr_lines,
         }
     except Exception as e:
         return {
             "stdout": "",
             "stderr": str(e),
             "returncode": -1,
+            "stdout_lines": 0,
+            "stderr_lines": 0,
         }
+    finally:
+        # Also reached when the calling task is cancelled, don't leave the child running
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+
+async def _awrite(path: Union[str, Path], data: str) -> None:
+    """Write a text file in a worker thread so the event loop stays responsive."""
+    await asyncio.to_thread(Path(path).write_text, data, encoding="utf-8")
+
+def _write_executable(path: Union[str, Path], data: str) -> None:
+    """Write a file with executable permissions, creating it with its final mode."""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o755)
+    try:
+        # The mode given to os.open is masked by the umask
+        os.fchmod(fd, 0o755)
+        remaining = memoryview(data.encode())
+        while remaining:
+            remaining = remaining[os.write(fd, remaining):]
+    finally:
+        os.close(fd)
+
+def _file_stamps(paths: List[str]) -> Optional[Tuple[Tuple[str, int], ...]]:
+    """Return the mtime of each file, or None if one of them is missing."""
+    try:
+        return tuple((path, os.stat(path).st_mtime_ns) for path in paths)
+    except OSError:
+        return None
+
+def _compile_inputs(contract_file: str, config_file: Optional[str]) -> Optional[List[str]]:
+    """Return the contract and config paths of a compilation, or None if it must not be cached."""
+    inputs = [os.path.abspath(contract_file)]
+    if config_file:
+        try:
+            config_text = Path(config_file).read_text(encoding="utf-8", errors="replace")
+        except OSError:
+            return None
+        # Custom compilation flags are not replayed by the cache, let Echidna compile
+        if "cryticArgs" in config_text or "solcArgs" in config_text:
+            return None
+        inputs.append(os.path.abspath(config_file))
+    return inputs
+
+def _archive_sources(archive: str) -> List[str]:
+    """Return the absolute paths of every source file a crytic-compile archive was built from."""
+    with open(archive) as f:
+        exported = json.load(f)
+    sources = set(exported.get("source_content", {}))
+    for unit in exported.get("compilation_units", {}).values():
+        sources.update(filename["absolute"] for filename in unit.get("filenames", []))
+    return sorted(sources)
+
+def _compile_stamps(inputs: List[str], archive: str) -> Optional[Tuple[Tuple[str, int], ...]]:
+    """Return the mtimes that invalidate a compilation: its inputs and every source it imports."""
+    try:
+        sources = _archive_sources(archive)
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+    return _file_stamps(inputs + [path for path in sources if path not in inputs])
+
+def _archive_is_current(stamps: Tuple[Tuple[str, int], ...], archive: str) -> bool:
+    """Check that none of the files a cached archive was compiled from changed."""
+    return _file_stamps([path for path, _ in stamps]) == stamps and os.path.exists(archive)
+
+async def _discard_archive(archive: str) -> None:
+    """Delete the export directory of an archive, or defer it while Echidna runs still read it."""
+    if _archive_users.get(archive):
+        _evicted_archives.add(archive)
+    else:
+        await asyncio.to_thread(shutil.rmtree, os.path.dirname(archive), ignore_errors=True)
+
+async def release_compiled_target(target: str) -> None:
+    """Release a target returned by get_compiled_target once Echidna is done with it."""
+    users = _archive_users.get(target)
+    if not users:
+        return
+    if users > 1:
+        _archive_users[target] = users - 1
+        return
+    del _archive_users[target]
+    if target in _evicted_archives:
+        _evicted_archives.discard(target)
+        await asyncio.to_thread(shutil.rmtree, os.path.dirname(target), ignore_errors=True)
+
+def _remove_compile_exports() -> None:
+    """Delete the export directories of the cached and evicted compilations."""
+    archives = [archive for _, archive in _compile_cache.values()]
+    for archive in archives + list(_evicted_archives):
+        shutil.rmtree(os.path.dirname(archive), ignore_errors=True)
+    _compile_cache.clear()
+    _evicted_archives.clear()
+
+atexit.register(_remove_compile_exports)
+
+async def get_compiled_target(
+    contract_file: str,
+    config_file: Optional[str] = None,
+) -> Tuple[str, Optional[Dict[str, Any]]]:
+    """
+    Return a crytic-compile archive for a Solidity file, compiling it only when it changed.
+
+    Echidna loads the archive without invoking solc again, which saves the compilation
+    on repeated runs against the same contract. The archive is rebuilt whenever the
+    contract, the config or any file they import is modified. Falls back to the original
+    file whenever the contract cannot be precompiled; if crytic-compile itself fails, its
+    result is returned as well so the caller does not compile the same file a second time.
+
+    The returned target must be passed to release_compiled_target after the run, an
+    archive replaced in the meantime is only deleted once no run reads it anymore.
+    """
+    if not contract_file.endswith(".sol"):
+        return contract_file, None
+
+    inputs = await asyncio.to_thread(_compile_inputs, contract_file, config_file)
+    if inputs is None:
+        return contract_file, None
+
+    cache_key = tuple(inputs)
+    async with _compile_locks.setdefault(cache_key, asyncio.Lock()):
+        cached = _compile_cache.get(cache_key)
+        if cached:
+            stamps, archive = cached
+            if await asyncio.to_thread(_archive_is_current, stamps, archive):
+                _archive_users[archive] = _archive_users.get(archive, 0) + 1
+                return archive, None
+            if _compile_cache.get(cache_key) is cached:
+                del _compile_cache[cache_key]
+            await _discard_archive(archive)
+
+        export_dir = await asyncio.to_thread(tempfile.mkdtemp, prefix="echidna-mcp-")
+        result = await run_command([
+            "crytic-compile", contract_file,
+            "--export-format", "archive",
+            "--export-dir", export_dir,
+        ])
+        archive = os.path.join(export_dir, f"{Path(contract_file).name}_export_archive.json")
+
+        if result["returncode"] != 0:
+            await asyncio.to_thread(shutil.rmtree, export_dir, ignore_errors=True)
+            return contract_file, result
+
+        stamps = await asyncio.to_thread(_compile_stamps, inputs, archive)
+        if stamps is None:
+            await asyncio.to_thread(shutil.rmtree, export_dir, ignore_errors=True)
+            return contract_file, None
+
+        _compile_cache[cache_key] = (stamps, archive)
+        _archive_users[archive] = _archive_users.get(archive, 0) + 1
+        return archive, None
+
+def _json_dumps(value: Any) -> str:
+    """Serialize a value as JSON, using orjson when it is installed."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(value).decode()
+        except orjson.JSONEncodeError:
+            # e.g. integers wider than 64 bits, which uint256 values often are
+            pass
+    return json.dumps(value)
+
+# Config value serializers, dispatched on the exact type (bool must not fall back to int)
+_YAML_FORMATTERS = {
+    bool: lambda value: "true" if value else "false",
+    int: str,
+    float: str,
+    str: str,
+    type(None): lambda value: "null",
+    list: _json_dumps,
+    dict: _json_dumps,
+}
+
+def _format_yaml_scalar(value: Any) -> str:
+    """Serialize a config value the way Echidna's YAML parser expects it."""
+    return _YAML_FORMATTERS.get(type(value), str)(value)
+
+@functools.lru_cache(maxsize=64)
+def _yaml_template(keys: Tuple[str, ...]) -> str:
+    """Build a format string with one `key: {}` line per key, reused for configs with the same keys."""
+    return "".join(f"{str(key).replace('{', '{{').replace('}', '}}')}: {{}}\n" for key in keys)
+
+def _format_yaml(config: Dict[str, Any]) -> str:
+    """Serialize a flat config dictionary as YAML text."""
+    return _yaml_template(tuple(config)).format(*map(_format_yaml_scalar, config.values()))
+
+@dataclass(frozen=True)
+class CorpusScan:
+    """Files of an Echidna corpus directory, as paths relative to the corpus root."""
+    coverage_files: Tuple[str, ...] = ()
+    coverage_mtimes: Tuple[float, ...] = ()
+    test_cases: Tuple[str, ...] = ()
+    reproducers: Tuple[str, ...] = ()
+    dir_mtimes: Tuple[Tuple[str, int], ...] = ()
+
+    def newest_coverage_file(self) -> Optional[str]:
+        """Return the most recently modified coverage file, if any."""
+        if not self.coverage_files:
+            return None
+        newest = max(range(len(self.coverage_files)), key=self.coverage_mtimes.__getitem__)
+        return self.coverage_files[newest]
+
+def _scan_corpus(corpus_dir: str) -> CorpusScan:
+    """
+    Classify every file of a corpus directory in a single tree walk.
+
+    The tools read at most one file of the corpus, so the walk itself is the I/O cost;
+    callers run it in a worker thread rather than through a batched I/O backend.
+    """
+    coverage = []  # (inode, path, mtime)
+    test_cases = []
+    reproducers = []
+    # Directory mtimes are taken before listing them, so files added during the walk invalidate it
+    dir_mtimes = [("", os.stat(corpus_dir).st_mtime_ns)]
+    pending = [("", "")]  # (directory relative to the corpus root, directory name)
+
+    while pending:
+        rel_dir, dir_name = pending.pop()
+        with os.scandir(os.path.join(corpus_dir, rel_dir)) as entries:
+            for entry in entries:
+                rel_path = os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+
+                if entry.is_dir(follow_symlinks=False):
+                    dir_mtimes.append((rel_path, entry.stat(follow_symlinks=False).st_mtime_ns))
+                    pending.append((rel_path, entry.name))
+                    continue
+
+                if not entry.name.endswith(".txt"):
+                    continue
+
+                # Coverage reports (covered.<timestamp>.txt)
+                if fnmatch.fnmatchcase(entry.name, "covered.*.txt"):
+                    coverage.append((entry.inode(), rel_path, entry.stat().st_mtime))
+
+                # Test cases and reproducers
+                if dir_name == "coverage":
+                    test_cases.append(rel_path)
+                elif dir_name == "reproducers":
+                    reproducers.append(rel_path)
+
+    # Inode order approximates on-disk order, which helps readahead on HDD and NFS corpora
+    coverage.sort()
+    return CorpusScan(
+        coverage_files=tuple(path for _, path, _ in coverage),
+        coverage_mtimes=tuple(mtime for _, _, mtime in coverage),
+        test_cases=tuple(test_cases),
+        reproducers=tuple(reproducers),
+        dir_mtimes=tuple(dir_mtimes),
+    )
+
+def _corpus_fingerprint(corpus_dir: str, dirs: List[str]) -> Optional[Tuple[Tuple[str, int], ...]]:
+    """
+    Return the current mtimes of the given corpus directories, or None if one disappeared.
+
+    Adding or removing a file or subdirectory changes the mtime of its parent, so comparing
+    the directories visited by a scan tells whether the scan is still complete.
+    """
+    try:
+        return tuple(
+            (rel_dir, os.stat(os.path.join(corpus_dir, rel_dir), follow_symlinks=False).st_mtime_ns)
+            for rel_dir in dirs
+        )
+    except OSError:
+        return None
+
+def _scan_existing_corpus(corpus_dir: str) -> Optional[CorpusScan]:
+    """Scan a corpus directory, or return None if it does not exist."""
+    if not os.path.exists(corpus_dir):
+        return None
+    return _scan_corpus(corpus_dir)
+
+async def _load_corpus(corpus_dir: str) -> Optional[CorpusScan]:
+    """
+    Scan a corpus directory, reusing the previous scan while none of its directories changed.
+
+    Returns None if the directory does not exist, so callers need no separate check. The
+    file system work runs in worker threads, the cache itself is only touched on the event loop.
+    """
+    corpus_dir = os.path.abspath(corpus_dir)
+    cached = _corpus_cache.get(corpus_dir)
+    if cached:
+        dirs = [rel_dir for rel_dir, _ in cached.dir_mtimes]
+        if await asyncio.to_thread(_corpus_fingerprint, corpus_dir, dirs) == cached.dir_mtimes:
+            return cached
+
+    scan_started = time.time_ns()
+    scan = await asyncio.to_thread(_scan_existing_corpus, corpus_dir)
+    _corpus_cache.pop(corpus_dir, None)
+    if scan is None:
+        return None
+
+    # A file added to a directory right after it was listed may not change its mtime
+    # (same timestamp tick), so like git's racy index entries, recently modified scans
+    # are not cached
+    if all(mtime < scan_started - CORPUS_RACY_WINDOW_NS for _, mtime in scan.dir_mtimes):
+        if len(_corpus_cache) >= CORPUS_CACHE_SIZE:
+            del _corpus_cache[next(iter(_corpus_cache))]
+        _corpus_cache[corpus_dir] = scan
+    return scan
+
+def _read_preview(path: str, size: int = 500) -> Tuple[str, int]:
+    """Read the first bytes of a file with a single pread and return them with the file size."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        return os.pread(fd, size, 0).decode(errors="replace"), os.fstat(fd).st_size
+    finally:
+        os.close(fd)
+
+def _summarize_coverage_file(path: str, preview_lines: int = 100) -> Tuple[str, int, int]:
+    """Stream a coverage report and return its first lines, total line count and covered line count."""
+    head = []
+    total_lines = 0
+    covered_lines = 0
+    with open(path, "rb") as f:
+        for line in f:
+            if total_lines < preview_lines:
+                head.append(line)
+            total_lines += 1
+            if b'*' in line:
+                covered_lines += 1
+    return b"".join(head).decode(errors="replace"), total_lines, covered_lines
 
 # Resources
 @mcp.resource("resource://echidna-features")
 def echidna_features() -> str:
-    """Provide documentation on Echidna features."""
-    features_path = Path(__file__).parent / "LLM" / "echdina-features.md"
-    with open(features_path, "r") as f:
-        return f.read()
+    """Provide documentation on Echidna features (read once, the file is static)."""
+    global _features_cache
+    if _features_cache is None:
+        _features_cache = _FEATURES_PATH.read_text()
+    return _features_cache
 
 # Tools
 @mcp.tool()
@@ -68,36 +487,48 @@ async def run_echidna_test(
     Returns:
         The results of the Echidna test run
     """
-    if ctx:
+    if ctx and _PROGRESS_ENABLED:
         await ctx.report_progress("Preparing Echidna test...", 1, 3)
     
-    cmd = ["echidna", contract_file]
-    
-    if contract_name:
-        cmd.extend(["--contract", contract_name])
-    
-    if config_file:
-        cmd.extend(["--config", config_file])
-    
-    if test_mode:
-        cmd.extend(["--test-mode", test_mode])
-    
-    if test_limit:
-        cmd.extend(["--test-limit", str(test_limit)])
-    
-    if seq_len:
-        cmd.extend(["--seq-len", str(seq_len)])
-    
-    if corpus_dir:
-        cmd.extend(["--corpus-dir", corpus_dir])
-    
-    if ctx:
-        await ctx.report_progress("Running Echidna...", 2, 3)
-        await ctx.info(f"Running command: {' '.join(cmd)}")
+    target, compile_result = await get_compiled_target(contract_file, config_file)
+    if compile_result is not None:
+        if ctx:
+            await ctx.info("Compilation failed, Echidna was not started")
+        return compile_result
     
-    result = run_command(cmd)
+    try:
+        cmd = ["echidna", target]
+        
+        if contract_name:
+            cmd.extend(["--contract", contract_name])
+        
+        if config_file:
+            cmd.extend(["--config", config_file])
+        
+        if test_mode:
+            cmd.extend(["--test-mode", test_mode])
+        
+        if test_limit:
+            cmd.extend(["--test-limit", str(test_limit)])
+        
+        if seq_len:
+            cmd.extend(["--seq-len", str(seq_len)])
+        
+        if corpus_dir:
+            cmd.extend(["--corpus-dir", corpus_dir])
+        
+        if ctx and _PROGRESS_ENABLED:
+            await ctx.report_progress("Running Echidna...", 2, 3)
+        
+        if ctx:
+            await ctx.info(f"Running command: {shlex.join(cmd)}")
+        
+        result = await run_command(cmd)
+    finally:
+        # The archive may be replaced by a concurrent run, it is deleted only once released
+        await release_compiled_target(target)
     
-    if ctx:
+    if ctx and _PROGRESS_ENABLED:
         await ctx.report_progress("Echidna test completed", 3, 3)
     
     return result
@@ -118,22 +549,10 @@ async def create_echidna_config(
     Returns:
         Status of the operation
     """
-    if ctx:
-        await ctx.report_progress("Creating Echidna config file...", 1, 2)
-    
     try:
-        with open(output_file, 'w') as f:
-            for key, value in config_params.items():
-                if isinstance(value, bool):
-                    f.write(f"{key}: {str(value).lower()}\n")
-                elif isinstance(value, (int, float)):
-                    f.write(f"{key}: {value}\n")
-                elif isinstance(value, str):
-                    f.write(f"{key}: {value}\n")
-                elif isinstance(value, list):
-                    f.write(f"{key}: {json.dumps(value)}\n")
+        await _awrite(output_file, _format_yaml(config_params))
         
-        if ctx:
+        if ctx and _PROGRESS_ENABLED:
             await ctx.report_progress("Config file created", 2, 2)
         
         return {
@@ -164,14 +583,10 @@ async def create_solidity_contract(
     Returns:
         Status of the operation
     """
-    if ctx:
-        await ctx.report_progress("Creating Solidity contract file...", 1, 2)
-    
     try:
-        with open(output_file, 'w') as f:
-            f.write(contract_code)
+        await _awrite(output_file, contract_code)
         
-        if ctx:
+        if ctx and _PROGRESS_ENABLED:
             await ctx.report_progress("Contract file created", 2, 2)
         
         return {
@@ -200,49 +615,39 @@ async def analyze_corpus(
     Returns:
         Analysis of the corpus
     """
-    if ctx:
+    if ctx and _PROGRESS_ENABLED:
         await ctx.report_progress("Analyzing corpus directory...", 1, 3)
     
     try:
-        corpus_path = Path(corpus_dir)
+        # Look for coverage files, test cases and reproducers in one pass
+        scan = await _load_corpus(corpus_dir)
         
-        if not corpus_path.exists():
+        if scan is None:
             return {
                 "success": False,
                 "message": f"Corpus directory {corpus_dir} does not exist"
             }
         
-        # Look for coverage files
-        coverage_files = list(corpus_path.glob("**/covered.*.txt"))
-        
-        # Look for test cases
-        test_cases = list(corpus_path.glob("**/coverage/*.txt"))
-        
-        # Look for reproducers
-        reproducers = list(corpus_path.glob("**/reproducers/*.txt"))
-        
-        if ctx:
-            await ctx.report_progress("Reading corpus files...", 2, 3)
-        
         # Process coverage files (extract sample info from first file)
         coverage_info = {}
-        if coverage_files:
-            with open(coverage_files[0], "r") as f:
-                coverage_data = f.read()
-                coverage_info = {
-                    "sample": coverage_data[:500] + ("..." if len(coverage_data) > 500 else ""),
-                    "size": len(coverage_data)
-                }
+        if scan.coverage_files:
+            sample, size = await asyncio.to_thread(
+                _read_preview, os.path.join(corpus_dir, scan.coverage_files[0])
+            )
+            coverage_info = {
+                "sample": sample + ("..." if size > 500 else ""),
+                "size": size
+            }
         
-        if ctx:
+        if ctx and _PROGRESS_ENABLED:
             await ctx.report_progress("Corpus analysis complete", 3, 3)
         
         return {
             "success": True,
             "corpus_dir": corpus_dir,
-            "coverage_files": [str(f.relative_to(corpus_path)) for f in coverage_files],
-            "test_cases": [str(f.relative_to(corpus_path)) for f in test_cases],
-            "reproducers": [str(f.relative_to(corpus_path)) for f in reproducers],
+            "coverage_files": list(scan.coverage_files),
+            "test_cases": list(scan.test_cases),
+            "reproducers": list(scan.reproducers),
             "coverage_sample": coverage_info
         }
     
@@ -272,20 +677,15 @@ async def filter_functions(
     Returns:
         Status of the operation
     """
-    if ctx:
-        await ctx.report_progress("Creating function filter config...", 1, 2)
-    
     try:
         config = {
             "filterBlacklist": blacklist,
             "filterFunctions": filter_list
         }
         
-        with open(output_config_file, 'w') as f:
-            f.write(f"filterBlacklist: {str(blacklist).lower()}\n")
-            f.write(f"filterFunctions: {json.dumps(filter_list)}\n")
+        await _awrite(output_config_file, _format_yaml(config))
         
-        if ctx:
+        if ctx and _PROGRESS_ENABLED:
             await ctx.report_progress("Filter config created", 2, 2)
         
         return {
@@ -317,12 +717,12 @@ async def setup_end_to_end_test(
     Returns:
         Result of the setup operation
     """
-    if ctx:
-        await ctx.report_progress("Setting up Etheno for end-to-end testing...", 1, 4)
+    if ctx and _PROGRESS_ENABLED:
+        await ctx.report_progress("Setting up Etheno for end-to-end testing...", 1, 3)
     
     # Start Etheno
     etheno_cmd = ["etheno", "--ganache", "--ganache-args=--miner.blockGasLimit 10000000", "-x", "init.json"]
-    etheno_result = run_command(etheno_cmd)
+    etheno_result = await run_command(etheno_cmd)
     
     if etheno_result["returncode"] != 0:
         return {
@@ -331,8 +731,8 @@ async def setup_end_to_end_test(
             "etheno_output": etheno_result
         }
     
-    if ctx:
-        await ctx.report_progress("Running test on Ganache...", 2, 4)
+    if ctx and _PROGRESS_ENABLED:
+        await ctx.report_progress("Running test on Ganache and creating Echidna config...", 2, 3)
     
     # Run the test on Ganache
     test_cmd = ["truffle", "test"]
@@ -340,11 +740,6 @@ async def setup_end_to_end_test(
         test_cmd.append(test_file)
     test_cmd.extend(["--network", "develop"])
     
-    test_result = run_command(test_cmd)
-    
-    if ctx:
-        await ctx.report_progress("Creating Echidna config...", 3, 4)
-    
     # Create Echidna config
     config = {
         "prefix": "crytic_",
@@ -352,15 +747,24 @@ async def setup_end_to_end_test(
         "allContracts": True
     }
     
-    with open("echidna.yaml", 'w') as f:
-        for key, value in config.items():
-            if isinstance(value, bool):
-                f.write(f"{key}: {str(value).lower()}\n")
-            else:
-                f.write(f"{key}: {value}\n")
+    # The config does not depend on the test run, write it while truffle is running.
+    # Both are awaited even if the write fails, so the test run is never left unsupervised.
+    test_result, write_error = await asyncio.gather(
+        run_command(test_cmd),
+        _awrite("echidna.yaml", _format_yaml(config)),
+        return_exceptions=True,
+    )
+    
+    if isinstance(write_error, Exception):
+        return {
+            "success": False,
+            "message": f"Failed to create Echidna config: {str(write_error)}",
+            "etheno_output": etheno_result,
+            "test_output": test_result
+        }
     
-    if ctx:
-        await ctx.report_progress("End-to-end setup completed", 4, 4)
+    if ctx and _PROGRESS_ENABLED:
+        await ctx.report_progress("End-to-end setup completed", 3, 3)
     
     return {
         "success": True,
@@ -375,103 +779,113 @@ async def setup_end_to_end_test(
         ]
     }
 
-@mcp.tool()
-async def generate_property_template(
-    contract_name: str,
-    property_type: str = "boolean",
-    ctx: Context = None,
-) -> Dict[str, Any]:
-    """
-    Generate a template for an Echidna property based on the specified type.
-    
-    Args:
-        contract_name: Name of the contract being tested
-        property_type: Type of property (boolean, assertion, dapptest)
-    
-    Returns:
-        Template code for the property
-    """
-    if ctx:
-        await ctx.report_progress("Generating property template...", 1, 2)
-    
-    templates = {
-        "boolean": f"""contract Test{contract_name} is {contract_name} {{
+# Property templates, formatted with the name of the contract under test as {n}
+_PROPERTY_TEMPLATES = {
+    "boolean": """contract Test{n} is {n} {{
     function echidna_property_description() public returns (bool) {{
         // Property logic here
         return true; // Property holds
     }}
 }}""",
-        
-        "assertion": f"""contract Test{contract_name} is {contract_name} {{
+    
+    "assertion": """contract Test{n} is {n} {{
     function check_invariant() public {{
         // Test logic here
         assert(true); // Property holds
     }}
 }}""",
-        
-        "dapptest": f"""contract Test{contract_name} is {contract_name} {{
+    
+    "dapptest": """contract Test{n} is {n} {{
     function testProperty(uint256 param1) public {{
         // Test logic with parameters
         // Will fail if it reverts (except with "FOUNDRY::ASSUME" reason)
     }}
 }}""",
-        
-        "optimization": f"""contract Test{contract_name} is {contract_name} {{
+    
+    "optimization": """contract Test{n} is {n} {{
     function echidna_opt_function() public view returns (int256) {{
         // Return a value to maximize
         return 0;
     }}
 }}"""
-    }
-    
-    if property_type not in templates:
-        return {
-            "success": False,
-            "message": f"Unknown property type: {property_type}. Available types: {', '.join(templates.keys())}"
-        }
-    
-    if ctx:
-        await ctx.report_progress("Template generated", 2, 2)
-    
-    return {
-        "success": True,
-        "template": templates[property_type],
-        "property_type": property_type,
-        "usage_notes": get_property_usage_notes(property_type)
-    }
+}
 
-def get_property_usage_notes(property_type: str) -> str:
-    """Return usage notes for a specific property type."""
-    notes = {
-        "boolean": """
+# Usage notes for each property type
+_PROPERTY_USAGE_NOTES = {
+    "boolean": """
 - Function name must start with 'echidna_'
 - Must return a boolean (true if property holds)
 - Side effects are reverted after execution
 - Will fail if it returns false or reverts
         """,
-        
-        "assertion": """
+    
+    "assertion": """
 - Use assert() to check conditions
 - Will fail if assert fails
 - Can also emit AssertionFailed event to indicate failure
 - Side effects are preserved
         """,
-        
-        "dapptest": """
+    
+    "dapptest": """
 - Requires one or more arguments
 - Will fail if execution reverts
 - Can use "FOUNDRY::ASSUME" revert reason to skip invalid inputs
 - Typically used with stateless testing (--seq-len 1)
         """,
-        
-        "optimization": """
+    
+    "optimization": """
 - Function name must start with 'echidna_opt_'
 - Must return an int256 value
 - Echidna will try to maximize this value
 - Run with --test-mode optimization
         """
+}
+
+@functools.lru_cache(maxsize=128)
+def _render_property_template(contract_name: str, property_type: str) -> Optional[str]:
+    """Return the property template for a contract, or None for an unknown property type."""
+    template = _PROPERTY_TEMPLATES.get(property_type)
+    if template is None:
+        return None
+    return template.format(n=contract_name)
+
+@mcp.tool()
+async def generate_property_template(
+    contract_name: str,
+    property_type: str = "boolean",
+    ctx: Context = None,
+) -> Dict[str, Any]:
+    """
+    Generate a template for an Echidna property based on the specified type.
+    
+    Args:
+        contract_name: Name of the contract being tested
+        property_type: Type of property (boolean, assertion, dapptest)
+    
+    Returns:
+        Template code for the property
+    """
+    template = _render_property_template(contract_name, property_type)
+    
+    if template is None:
+        return {
+            "success": False,
+            "message": f"Unknown property type: {property_type}. Available types: {', '.join(_PROPERTY_TEMPLATES.keys())}"
+        }
+    
+    if ctx and _PROGRESS_ENABLED:
+        await ctx.report_progress("Template generated", 2, 2)
+    
+    return {
+        "success": True,
+        "template": template,
+        "property_type": property_type,
+        "usage_notes": get_property_usage_notes(property_type)
     }
-    return notes.get(property_type, "")
+
+def get_property_usage_notes(property_type: str) -> str:
+    """Return usage notes for a specific property type."""
+    return _PROPERTY_USAGE_NOTES.get(property_type, "")
 
 @mcp.tool()
 async def create_assertion_contract(
@@ -491,11 +905,8 @@ async def create_assertion_contract(
     Returns:
         Result of the operation
     """
-    if ctx:
-        await ctx.report_progress("Creating assertion contract...", 1, 2)
-    
     try:
-        contract_code = f"""// SPDX-License-Identifier: MIT
+        parts = [f"""// SPDX-License-Identifier: MIT
 pragma solidity ^0.8.0;
 
 import "./{contract_to_test}.sol";
@@ -504,23 +915,22 @@ contract Test{contract_to_test} is {contract_to_test} {{
     // Define event that Echidna will detect
     event AssertionFailed(string message);
     
-"""
+"""]
         
-        for prop in properties:
-            contract_code += f"""    function {prop['name']}() public {{
+        parts.extend(f"""    function {prop['name']}() public {{
         if (!({prop['condition']})) {{
             emit AssertionFailed("{prop['name']} failed");
         }}
     }}
     
-"""
+""" for prop in properties)
         
-        contract_code += "}"
+        parts.append("}")
+        contract_code = "".join(parts)
         
-        with open(output_file, 'w') as f:
-            f.write(contract_code)
+        await _awrite(output_file, contract_code)
         
-        if ctx:
+        if ctx and _PROGRESS_ENABLED:
             await ctx.report_progress("Assertion contract created", 2, 2)
         
         return {
@@ -556,27 +966,23 @@ async def create_fork_test(
     Returns:
         Result of the operation and next steps
     """
-    if ctx:
-        await ctx.report_progress("Creating state fork test...", 1, 3)
-    
     try:
-        with open(output_file, 'w') as f:
-            f.write(contract_code)
+        await _awrite(output_file, contract_code)
         
         # Create a shell script to run the test with the RPC environment variables
         script_path = Path(output_file).with_suffix('.sh')
-        with open(script_path, 'w') as f:
-            f.write("#!/bin/bash\n\n")
-            f.write(f"export ECHIDNA_RPC_URL={rpc_url}\n")
-            if block_number:
-                f.write(f"export ECHIDNA_RPC_BLOCK={block_number}\n")
-            f.write("\n")
-            f.write(f"echidna {output_file} --test-mode assertion\n")
-        
-        # Make the script executable
-        os.chmod(script_path, 0o755)
+        rpc_env = f"ECHIDNA_RPC_URL={shlex.quote(rpc_url)}"
+        block_env = f"ECHIDNA_RPC_BLOCK={block_number}" if block_number else None
+        echidna_cmd = f"echidna {shlex.quote(output_file)} --test-mode assertion"
+        script = "".join([
+            "#!/bin/bash\n\n",
+            f"export {rpc_env}\n",
+            f"export {block_env}\n" if block_env else "",
+            f"\n{echidna_cmd}\n",
+        ])
+        await asyncio.to_thread(_write_executable, script_path, script)
         
-        if ctx:
+        if ctx and _PROGRESS_ENABLED:
             await ctx.report_progress("Fork test created", 3, 3)
         
         return {
@@ -585,11 +991,9 @@ async def create_fork_test(
             "contract_file": output_file,
             "script_file": str(script_path),
             "next_steps": [
-                f"Run the test with: sh {script_path}",
+                f"Run the test with: sh {shlex.quote(str(script_path))}",
                 "Or manually set environment variables:",
-                f"ECHIDNA_RPC_URL={rpc_url} " + 
-                (f"ECHIDNA_RPC_BLOCK={block_number} " if block_number else "") + 
-                f"echidna {output_file} --test-mode assertion"
+                " ".join(filter(None, [rpc_env, block_env, echidna_cmd]))
             ]
         }
     
@@ -615,55 +1019,49 @@ async def visualize_coverage(
     Returns:
         Coverage visualization
     """
-    if ctx:
+    if ctx and _PROGRESS_ENABLED:
         await ctx.report_progress("Analyzing coverage data...", 1, 3)
     
     try:
-        corpus_path = Path(corpus_dir)
+        # Find the most recent coverage file
+        scan = await _load_corpus(corpus_dir)
         
-        if not corpus_path.exists():
+        if scan is None:
             return {
                 "success": False,
                 "message": f"Corpus directory {corpus_dir} does not exist"
             }
         
-        # Find coverage files
-        coverage_files = list(corpus_path.glob("**/covered.*.txt"))
+        newest = scan.newest_coverage_file()
         
-        if not coverage_files:
+        if newest is None:
             return {
                 "success": False,
                 "message": "No coverage files found in corpus directory"
             }
         
-        # Parse the most recent coverage file
-        coverage_files.sort(key=lambda x: x.stat().st_mtime, reverse=True)
-        most_recent = coverage_files[0]
+        most_recent = os.path.join(corpus_dir, newest)
         
-        with open(most_recent, "r") as f:
-            coverage_data = f.readlines()
+        preview, total_lines, covered_lines = await asyncio.to_thread(_summarize_coverage_file, most_recent)
         
         # Process coverage data
-        if ctx:
-            await ctx.report_progress("Processing coverage data...", 2, 3)
-        
         if output_format == "text":
-            if ctx:
+            if ctx and _PROGRESS_ENABLED:
                 await ctx.report_progress("Coverage visualization complete", 3, 3)
             
             return {
                 "success": True,
                 "format": "text",
-                "coverage_file": str(most_recent),
-                "coverage_data": "".join(coverage_data[:100]) + "..." if len(coverage_data) > 100 else "".join(coverage_data),
-                "total_lines": len(coverage_data),
-                "covered_lines": sum(1 for line in coverage_data if '*' in line)
+                "coverage_file": most_recent,
+                "coverage_data": preview + ("..." if total_lines > 100 else ""),
+                "total_lines": total_lines,
+                "covered_lines": covered_lines
             }
         
         elif output_format == "image":
             # This is a placeholder for actual image generation
             # In a real implementation, you would generate a coverage visualization image
-            if ctx:
+            if ctx and _PROGRESS_ENABLED:
                 await ctx.report_progress("Image generation not implemented", 3, 3)
             
             return {